@@ -0,0 +1,67 @@
+"""
+Bytes on the wire and CPU time per `GET /todo/` response for every format and encoding
+
+    python -m benchmarks.encoding_benchmark
+
+CPU time includes rendering of the body and its compression, compressed the same way as
+`CompressionMiddleware` does it.
+"""
+import time
+import timeit
+from functools import partial
+from starlette.responses import JSONResponse
+from todo_app.encoding import COMPRESSORS, MessagePackResponse
+
+SIZES = (100, 1000, 10000)
+RENDERERS = {
+    "json": JSONResponse(None).render,
+    "msgpack": MessagePackResponse(None).render,
+}
+
+
+def make_todos(count: int) -> list:
+    return [
+        {
+            "id": i,
+            "title": f"Todo number {i}",
+            "description": "Buy milk, bread and something for the weekend",
+            "priority": i % 5 + 1,
+            "complete": i % 3 == 0,
+            "owner_id": 1,
+        }
+        for i in range(count)
+    ]
+
+
+def encode(todos: list, render, encoding: str) -> bytes:
+    body = render(todos)
+    if encoding == "identity":
+        return body
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(body) + compressor.flush()
+
+
+def main():
+    print(f"{'todos':>6} {'format':<8} {'encoding':<9} {'bytes':>10} {'cpu, ms':>9}")
+    for size in SIZES:
+        todos = make_todos(size)
+        number = max(10000 // size, 3)
+        for format_name, render in RENDERERS.items():
+            for encoding in ("identity", *COMPRESSORS):
+                body = encode(todos, render, encoding)
+                cpu_time = min(
+                    timeit.repeat(
+                        partial(encode, todos, render, encoding),
+                        timer=time.process_time,
+                        number=number,
+                        repeat=3,
+                    )
+                )
+                print(
+                    f"{size:>6} {format_name:<8} {encoding:<9} {len(body):>10} "
+                    f"{cpu_time / number * 1000:>9.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Per-query overhead of `todo_app.repository` compared with the legacy `Query` API
+
+    python -m benchmarks.repository_benchmark
+
+Runs against in-memory sqlite with a few rows, so the database time is small and the same for
+every variant, and the difference between them is the Python overhead of building and
+compiling statements.
+"""
+import timeit
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from todo_app import repository
+from todo_app.database import Base
+from todo_app.models import Todos, Users
+
+NUMBER = 5000
+
+
+def main():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    database = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    database.add(Users(username="user", email="user", role="user"))
+    database.add_all(
+        Todos(title=f"todo {i}", description="todo", priority=1, owner_id=1)
+        for i in range(10)
+    )
+    database.commit()
+
+    cases = {
+        "user todos": (
+            lambda: database.query(Todos)
+            .filter(Todos.owner_id == 1)
+            .filter(Todos.deleted_at.is_(None))
+            .all(),
+            lambda: repository.get_user_todos(database, 1),
+        ),
+        "user todo by id": (
+            lambda: database.query(Todos)
+            .filter(Todos.id == 5)
+            .filter(Todos.owner_id == 1)
+            .filter(Todos.deleted_at.is_(None))
+            .first(),
+            lambda: repository.get_user_todo(database, 5, 1),
+        ),
+        "user by username": (
+            lambda: database.query(Users).filter(Users.username == "user").first(),
+            lambda: repository.get_user_by_username(database, "user"),
+        ),
+        "all users": (
+            lambda: database.query(Users).all(),
+            lambda: repository.get_all_users(database),
+        ),
+    }
+    print(f"{'query':<20}{'Query API, us':>16}{'repository, us':>16}")
+    for name, (legacy, cached) in cases.items():
+        legacy_time = min(timeit.repeat(legacy, number=NUMBER, repeat=3)) / NUMBER
+        cached_time = min(timeit.repeat(cached, number=NUMBER, repeat=3)) / NUMBER
+        print(f"{name:<20}{legacy_time * 1e6:>16.1f}{cached_time * 1e6:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Production entry point of the service
+
+    python -m todo_app serve --workers 4
+
+Every option could be set with environment variable or in `.env` file as well (HOST, PORT,
+WEB_CONCURRENCY, GRACEFUL_SHUTDOWN_TIMEOUT).
+"""
+import argparse
+import os
+from dotenv import load_dotenv
+
+
+def serve(args: argparse.Namespace):
+    import uvicorn  # pylint: disable=import-outside-toplevel
+    from todo_app import models  # pylint: disable=import-outside-toplevel
+    from todo_app.database import engine  # pylint: disable=import-outside-toplevel
+
+    # Creating tables once here instead of in every worker. Workers inherit the environment,
+    # `DB_CREATE_ALL=0` makes `todo_app.main.lifespan` skip creating them again
+    models.create_schema(engine)
+    engine.dispose()
+    os.environ["DB_CREATE_ALL"] = "0"
+
+    # On SIGTERM/SIGINT uvicorn stops accepting new connections and waits for in-flight
+    # requests to finish, `timeout_graceful_shutdown` limits how long it waits for them
+    uvicorn.run(
+        "todo_app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="uvloop",
+        http="httptools",
+        timeout_graceful_shutdown=args.graceful_timeout,
+        access_log=args.access_log,
+    )
+
+
+def main():
+    # Options are read from the environment before `todo_app.main`, which loads `.env` for the
+    # workers, is imported
+    load_dotenv()
+    parser = argparse.ArgumentParser(prog="python -m todo_app")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the service with uvicorn")
+    serve_parser.add_argument("--host", default=os.environ.get("HOST", "127.0.0.1"))
+    serve_parser.add_argument(
+        "--port", type=int, default=int(os.environ.get("PORT", "8000"))
+    )
+    serve_parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("WEB_CONCURRENCY", str(os.cpu_count() or 1))),
+    )
+    serve_parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=int(os.environ.get("GRACEFUL_SHUTDOWN_TIMEOUT", "30")),
+    )
+    serve_parser.add_argument(
+        "--access-log", action=argparse.BooleanOptionalAction, default=False
+    )
+    serve_parser.set_defaults(handler=serve)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 """
 Going to be used for link FastAPI application with our sqlite database
 """
+import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -15,6 +16,11 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 
+# Pooled connections must not be shared between processes. When the application is preloaded
+# and then forked into workers (e.g. `gunicorn --preload`), every worker starts with its own pool
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -0,0 +1,319 @@
+"""
+Content negotiation of response and request bodies
+
+* `CompressionMiddleware` compresses responses with zstd, brotli or gzip, chosen by
+  `Accept-Encoding` header. Responses smaller than `COMPRESSION_MINIMUM_SIZE` are sent as they
+  are. Bodies are compressed chunk by chunk, so streaming responses are not buffered whole.
+* `NegotiatedRoute` returns MessagePack instead of JSON when the client prefers
+  `application/msgpack` in `Accept` header, and decodes MessagePack and compressed request
+  bodies (`Content-Type: application/msgpack`, `Content-Encoding: gzip/br/zstd`).
+  Decompressed request body is limited by `REQUEST_BODY_MAX_SIZE` (1 MiB by default).
+
+brotli, zstandard and msgpack are optional, formats of missing libraries are not offered.
+"""
+import os
+import zlib
+from typing import Any, Callable, Coroutine, Dict, Optional
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from todo_app.exceptions import (
+    InvalidRequestBody,
+    RequestBodyTooLarge,
+    UnsupportedContentEncoding,
+)
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover
+    brotli = None  # type: ignore
+try:
+    import msgpack  # type: ignore
+except ImportError:  # pragma: no cover
+    msgpack = None  # type: ignore
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def compression_minimum_size() -> int:
+    return int(os.environ.get("COMPRESSION_MINIMUM_SIZE", "500"))
+
+
+def request_body_max_size() -> int:
+    return int(os.environ.get("REQUEST_BODY_MAX_SIZE", str(1024 * 1024)))
+
+
+class _BrotliCompressor:
+    def __init__(self):
+        # Quality 4 is close to gzip by speed with better ratio, 11 is far too slow for responses
+        self._compressor = brotli.Compressor(quality=4)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _gzip_compressor():
+    # wbits=31 writes gzip header and trailer around the deflate stream
+    return zlib.compressobj(6, zlib.DEFLATED, 31)
+
+
+def _zstd_compressor():
+    return zstandard.ZstdCompressor(level=3).compressobj()
+
+
+# In order of preference, when client accepts several of them with the same quality
+COMPRESSORS: Dict[str, Callable] = {
+    encoding: compressor
+    for encoding, compressor, available in (
+        ("zstd", _zstd_compressor, zstandard is not None),
+        ("br", _BrotliCompressor, brotli is not None),
+        ("gzip", _gzip_compressor, True),
+    )
+    if available
+}
+
+
+# Largest output of a zstd block per byte of input, a 4 bytes RLE block decodes into 128 KiB
+_ZSTD_MAX_RATIO = 32 * 1024
+
+
+def _gunzip(data: bytes, limit: int) -> bytes:
+    decompressor = zlib.decompressobj(wbits=31)
+    body = decompressor.decompress(data, limit + 1)
+    # Not finished stream is truncated, unused data is another gzip member or garbage
+    if len(body) <= limit and (not decompressor.eof or decompressor.unused_data):
+        raise InvalidRequestBody()
+    return body
+
+
+def _brotli_decompress(data: bytes, limit: int) -> bytes:
+    decompressor = brotli.Decompressor()
+    # Output is returned in chunks of about `output_buffer_limit`, the rest is kept inside
+    chunks = [decompressor.process(data, output_buffer_limit=limit + 1)]
+    size = len(chunks[0])
+    while size <= limit and not decompressor.is_finished():
+        if decompressor.can_accept_more_data():
+            raise InvalidRequestBody()
+        chunks.append(decompressor.process(b"", output_buffer_limit=limit + 1 - size))
+        size += len(chunks[-1])
+    return b"".join(chunks)
+
+
+def _zstd_decompress(data: bytes, limit: int) -> bytes:
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    # `decompress()` has no output limit and a few bytes of zstd block could decode into
+    # 128 KiB, so input is fed in pieces small enough to decode into about `limit` (or one
+    # block when `limit` is smaller than a block)
+    step = max(limit // _ZSTD_MAX_RATIO, 1)
+    view = memoryview(data)
+    chunks, size, position = [], 0, 0
+    while position < len(data) and size <= limit and not decompressor.eof:
+        chunks.append(decompressor.decompress(view[position : position + step]))
+        size += len(chunks[-1])
+        position += step
+    if size <= limit and (
+        not decompressor.eof or decompressor.unused_data or position < len(data)
+    ):
+        raise InvalidRequestBody()
+    return b"".join(chunks)
+
+
+# Every decompressor stops after `limit + 1` bytes of output, so a small body could not
+# inflate into a huge one in memory
+DECOMPRESSORS: Dict[str, Callable[[bytes, int], bytes]] = {"gzip": _gunzip}
+if brotli is not None:
+    DECOMPRESSORS["br"] = _brotli_decompress
+if zstandard is not None:
+    DECOMPRESSORS["zstd"] = _zstd_decompress
+
+
+def parse_qualities(header: str) -> Dict[str, float]:
+    """
+    Parses `Accept` like header into {value: quality}, `gzip;q=0.5, br` -> {gzip: 0.5, br: 1}
+    """
+    qualities = {}
+    for item in header.split(","):
+        value, *params = (part.strip() for part in item.split(";"))
+        if not value:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        qualities[value.lower()] = quality
+    return qualities
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    qualities = parse_qualities(accept_encoding)
+    best, best_quality = None, 0.0
+    for encoding in COMPRESSORS:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def accepts_msgpack(accept: str) -> bool:
+    if msgpack is None:
+        return False
+    qualities = parse_qualities(accept)
+    msgpack_quality = max(qualities.get(media, 0.0) for media in MSGPACK_MEDIA_TYPES)
+    return msgpack_quality > 0 and msgpack_quality >= qualities.get(
+        "application/json", 0.0
+    )
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = (
+            compression_minimum_size() if minimum_size is None else minimum_size
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            encoding = negotiate_encoding(
+                Headers(scope=scope).get("accept-encoding", "")
+            )
+            if encoding is not None:
+                responder = _CompressionResponder(self.app, encoding, self.minimum_size)
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send
+        self.start_message: Message = {}
+        self.compressor: Any = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message):
+        if message["type"] == "http.response.start":
+            # Headers depend on the first body chunk, so they are sent together with it
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if "content-encoding" in headers or (
+                not more_body and len(body) < self.minimum_size
+            ):
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            self.compressor = COMPRESSORS[self.encoding]()
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            del headers["Content-Length"]
+            body = self.compressor.compress(body)
+            if not more_body:
+                body += self.compressor.flush()
+                headers["Content-Length"] = str(len(body))
+            await self.send(self.start_message)
+        else:
+            body = self.compressor.compress(body)
+            if not more_body:
+                body += self.compressor.flush()
+        await self.send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
+
+
+class MessagePackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content)
+
+
+class DecodedRequest(Request):
+    """
+    Request with decompressed body, MessagePack body is returned by `json()`.
+    Decompressed body above `REQUEST_BODY_MAX_SIZE` is rejected with 413, unknown
+    `Content-Encoding` with 415.
+    """
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            encoding = self.headers.get("content-encoding", "identity").strip().lower()
+            if encoding != "identity":
+                if encoding not in DECOMPRESSORS:
+                    raise UnsupportedContentEncoding()
+                limit = request_body_max_size()
+                try:
+                    body = DECOMPRESSORS[encoding](body, limit)
+                except InvalidRequestBody:
+                    raise
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    raise InvalidRequestBody() from error
+                if len(body) > limit:
+                    raise RequestBodyTooLarge()
+            self._body = body  # pylint: disable=attribute-defined-outside-init
+        return self._body
+
+    async def json(self) -> Any:
+        if not self.scope.get("msgpack_body"):
+            return await super().json()
+        return msgpack.unpackb(await self.body())
+
+
+class NegotiatedRoute(APIRoute):
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        json_handler = super().get_route_handler()
+        response_class = self.response_class
+        self.response_class = MessagePackResponse
+        msgpack_handler = super().get_route_handler()
+        self.response_class = response_class
+
+        async def negotiated_route_handler(request: Request) -> Response:
+            scope = request.scope
+            content_type = request.headers.get("content-type", "").split(";")[0]
+            if msgpack is not None and content_type.strip() in MSGPACK_MEDIA_TYPES:
+                # FastAPI reads body with `json()` only for JSON content type
+                scope = dict(scope, msgpack_body=True)
+                scope["headers"] = [
+                    (name, b"application/json" if name == b"content-type" else value)
+                    for name, value in scope["headers"]
+                ]
+            request = DecodedRequest(scope, request.receive)
+            if "content-encoding" in request.headers:
+                # Decoded before FastAPI reads it, FastAPI turns any body error into 400
+                await request.body()
+            if accepts_msgpack(request.headers.get("accept", "")):
+                response = await msgpack_handler(request)
+            else:
+                response = await json_handler(request)
+            response.headers.add_vary_header("Accept")
+            return response
+
+        return negotiated_route_handler
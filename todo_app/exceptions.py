@@ -3,7 +3,13 @@ Custom HTTP exceptions
 """
 from dataclasses import dataclass
 from starlette.exceptions import HTTPException
-from starlette.status import HTTP_401_UNAUTHORIZED, HTTP_404_NOT_FOUND
+from starlette.status import (
+    HTTP_400_BAD_REQUEST,
+    HTTP_401_UNAUTHORIZED,
+    HTTP_404_NOT_FOUND,
+    HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+)
 
 
 @dataclass
@@ -22,3 +28,21 @@ class AuthenticationFailed(HTTPException):
 class UserNotFoundException(HTTPException):
     status_code: int = HTTP_404_NOT_FOUND
     detail: str = "User not found"
+
+
+@dataclass
+class InvalidRequestBody(HTTPException):
+    status_code: int = HTTP_400_BAD_REQUEST
+    detail: str = "Request body could not be decoded"
+
+
+@dataclass
+class RequestBodyTooLarge(HTTPException):
+    status_code: int = HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    detail: str = "Request body is too large"
+
+
+@dataclass
+class UnsupportedContentEncoding(HTTPException):
+    status_code: int = HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    detail: str = "Unsupported Content-Encoding"
@@ -1,18 +1,48 @@
+import asyncio
+import contextlib
+import os
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
 from fastapi import FastAPI
 from starlette.responses import JSONResponse
 from starlette.requests import Request
 from todo_app import models
 from todo_app.database import engine
+from todo_app.encoding import CompressionMiddleware
+from todo_app.purge import purge_enabled, purge_periodically
+from todo_app.profiling import install_profiler, profiling_enabled
 from todo_app.routers import auth, todos, admin, users
 
-app = FastAPI()
+load_dotenv()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # `python -m todo_app serve` creates tables once before starting the workers
+    if os.environ.get("DB_CREATE_ALL", "1") == "1":
+        models.create_schema(engine)
+    purge_task = asyncio.create_task(purge_periodically()) if purge_enabled() else None
+    yield
+    if purge_task:
+        purge_task.cancel()
+        # Waiting for the batch which could be running, before closing its connections
+        with contextlib.suppress(asyncio.CancelledError):
+            await purge_task
+    engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(CompressionMiddleware)
 
-models.Base.metadata.create_all(bind=engine)
 app.include_router(auth.router)
 app.include_router(todos.router)
 app.include_router(admin.router)
 app.include_router(users.router)
 
+if profiling_enabled():
+    install_profiler(app)
+
 
 @app.exception_handler(Exception)
 async def exception_handler(
@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import deferred
 from todo_app.database import Base
 
 
@@ -31,8 +34,60 @@ class Todos(Base):
     priority = Column(Integer, nullable=False)
     complete = Column(Boolean, default=False)
     owner_id = Column(Integer, ForeignKey("users.id"))
+    # Soft delete marker, deleted todos are hard deleted later by `todo_app.purge`.
+    # Deferred so it is not loaded (and not returned in responses) with the todo
+    deleted_at = deferred(Column(DateTime, nullable=True))
 
     def update(self, **kwargs):
         for field, value in kwargs.items():
             if value is not None:
                 setattr(self, field, value)
+
+
+# Reads are only for live todos, so indexing only them keeps the index small
+todos_owner_id_live_index = Index(
+    "ix_todos_owner_id_live",
+    Todos.owner_id,
+    sqlite_where=Todos.deleted_at.is_(None),
+    postgresql_where=Todos.deleted_at.is_(None),
+)
+
+
+class PurgeState(Base):
+    """
+    Single row shared by all workers, so only one of them purges deleted todos at a time
+    """
+
+    __tablename__ = "purge_state"
+
+    id = Column(Integer, primary_key=True)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    purged_total = Column(Integer, nullable=False, default=0)
+    last_purge_at = Column(DateTime, nullable=True)
+
+
+def create_schema(bind):
+    """
+    Creates missing tables and adds columns and indexes which were added to existing tables
+    later, `create_all` does not change existing tables
+    """
+    # Workers starting together race on upgrading the same database, the one which lost a
+    # step fails with "already exists", so it inspects the schema again and goes on from there
+    attempts = len(Base.metadata.tables) + 2
+    for attempt in range(attempts):
+        try:
+            _create_schema(bind)
+            return
+        except OperationalError:
+            if attempt == attempts - 1:
+                raise
+
+
+def _create_schema(bind):
+    Base.metadata.create_all(bind=bind)
+    todos_columns = {column["name"] for column in inspect(bind).get_columns("todos")}
+    if "deleted_at" not in todos_columns:
+        with bind.begin() as connection:
+            connection.execute(text("ALTER TABLE todos ADD COLUMN deleted_at DATETIME"))
+    todos_owner_id_live_index.create(bind=bind, checkfirst=True)
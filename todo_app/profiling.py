@@ -0,0 +1,171 @@
+"""
+Opt-in per-request profiling for admins.
+
+Turned on with `PROFILING_ENABLED` environment variable. When it is off the middleware and
+the SQL listeners are not installed at all, so there is no overhead. When it is on, a request
+sent with `X-Profile` header by an admin user is profiled and the result is written into
+`PROFILING_DIR` (keeping only the last `PROFILING_MAX_FILES` profiles):
+  * `<profile_id>.prof` - pstats dump, could be opened with `python -m pstats` or snakeviz
+  * `<profile_id>.json` - request info with SQL statements and their timings
+Profile id is returned back in `X-Profile-Id` response header.
+
+cProfile records everything running on the event loop thread, so a request is profiled only
+when no other request is in flight, otherwise `X-Profile-Skipped: busy` is returned and the
+request should be retried. `concurrent_requests` in the json tells how many requests started
+while it was profiled (their work is mixed into the profile). Sync `def`
+endpoints run in the threadpool and are not profiled, their SQL statements are still recorded.
+"""
+import cProfile
+import json
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from todo_app.exceptions import AuthenticationFailed
+from todo_app.routers.auth import get_current_user
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_SKIPPED_HEADER = "X-Profile-Skipped"
+
+# SQL statements of the request being profiled, `None` for all other requests
+_sql_statements: ContextVar[Optional[list]] = ContextVar("sql_statements", default=None)
+# cProfile could not run two profilers at once, so only one request is profiled at a time
+_profiling_lock = threading.Lock()
+
+
+class _RequestsInFlight:
+    def __init__(self):
+        self.count = 0
+        self.peak = 0
+
+    def __enter__(self):
+        self.count += 1
+        self.peak = max(self.peak, self.count)
+
+    def __exit__(self, *exc_info):
+        self.count -= 1
+
+
+_requests_in_flight = _RequestsInFlight()
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get("PROFILING_ENABLED", "").lower() in ("1", "true", "yes")
+
+
+def profiles_dir() -> Path:
+    return Path(os.environ.get("PROFILING_DIR", "./profiles"))
+
+
+def max_profiles() -> int:
+    return int(os.environ.get("PROFILING_MAX_FILES", "20"))
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):  # pylint: disable=unused-argument,too-many-arguments
+    if _sql_statements.get() is not None:
+        conn.info.setdefault("profiling_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):  # pylint: disable=unused-argument,too-many-arguments
+    statements = _sql_statements.get()
+    if statements is not None and conn.info.get("profiling_start"):
+        started = conn.info["profiling_start"].pop()
+        statements.append(
+            {
+                "statement": statement,
+                "parameters": repr(parameters),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            }
+        )
+
+
+async def _is_admin(request: Request) -> bool:
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        user = await get_current_user(token)
+    except AuthenticationFailed:
+        return False
+    return user.get("user_role") == "admin"
+
+
+def store_profile(
+    profiler: cProfile.Profile, info: dict, directory: Optional[Path] = None
+) -> str:
+    """
+    Writes profile into directory and removes the oldest ones above `PROFILING_MAX_FILES`
+    """
+    directory = directory or profiles_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profile_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    profiler.dump_stats(directory / f"{profile_id}.prof")
+    (directory / f"{profile_id}.json").write_text(json.dumps(info, indent=2))
+
+    # Profile ids are starting with timestamp, so sorting them is sorting by creation time
+    stored = sorted(path.stem for path in directory.glob("*.prof"))
+    for stale_id in stored[: max(len(stored) - max_profiles(), 0)]:
+        (directory / f"{stale_id}.prof").unlink(missing_ok=True)
+        (directory / f"{stale_id}.json").unlink(missing_ok=True)
+    return profile_id
+
+
+def install_profiler(app: FastAPI):
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        with _requests_in_flight:
+            return await _profile_request(request, call_next)
+
+
+async def _profile_request(request: Request, call_next):
+    if PROFILE_HEADER not in request.headers or not await _is_admin(request):
+        return await call_next(request)
+    # Checked after the await, nothing is awaited until the lock is taken below
+    if _profiling_lock.locked() or _requests_in_flight.count > 1:
+        response = await call_next(request)
+        response.headers[PROFILE_SKIPPED_HEADER] = "busy"
+        return response
+
+    statements: list = []
+    token = _sql_statements.set(statements)
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    _requests_in_flight.peak = _requests_in_flight.count
+    with _profiling_lock:
+        try:
+            profiler.enable()
+            response = await call_next(request)
+        finally:
+            profiler.disable()
+            _sql_statements.reset(token)
+
+    profile_id = await run_in_threadpool(
+        store_profile,
+        profiler,
+        {
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": response.status_code,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "concurrent_requests": _requests_in_flight.peak - 1,
+            "sql": statements,
+        },
+    )
+    response.headers[PROFILE_ID_HEADER] = profile_id
+    return response
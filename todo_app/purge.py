@@ -0,0 +1,230 @@
+"""
+Purging of soft deleted todos
+
+Deleted todos are kept as tombstones (`Todos.deleted_at`) for `PURGE_RETENTION_SECONDS`, so
+admins could restore them. After that they are hard deleted by a background task, in batches
+of `PURGE_BATCH_SIZE` and only while no request is using the database, so purging does not
+contend with requests for the SQLite lock.
+
+Every worker runs the task, but only the one holding the lease in `purge_state` table purges.
+The lease is taken only when the database is idle and some tombstones are due. It expires if
+its owner stops renewing it, then another worker takes it over. On SQLite neither the lease nor
+a batch waits for the lock held by other workers, they are postponed to the next period.
+Purge stats are kept in the same row, so they are the same whichever worker serves them.
+"""
+import asyncio
+import logging
+import os
+import socket
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional, cast
+from sqlalchemy import CursorResult, delete, func, or_, select, text, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from todo_app.database import SessionLocal, engine
+from todo_app.models import PurgeState, Todos
+
+logger = logging.getLogger(__name__)
+
+PURGE_STATE_ID = 1
+
+
+def purge_enabled() -> bool:
+    return os.environ.get("PURGE_ENABLED", "1") == "1"
+
+
+def purge_interval() -> float:
+    return float(os.environ.get("PURGE_INTERVAL_SECONDS", "60"))
+
+
+def purge_batch_size() -> int:
+    return int(os.environ.get("PURGE_BATCH_SIZE", "100"))
+
+
+def purge_retention() -> timedelta:
+    return timedelta(seconds=int(os.environ.get("PURGE_RETENTION_SECONDS", "604800")))
+
+
+def purge_lease_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _ensure_purge_state(database: Session):
+    if database.get(PurgeState, PURGE_STATE_ID) is not None:
+        return
+    database.add(PurgeState(id=PURGE_STATE_ID, purged_total=0))
+    try:
+        database.commit()
+    except IntegrityError:
+        # Created by another worker in the meantime
+        database.rollback()
+
+
+def acquire_purge_lease(
+    database: Session, owner: str, duration: Optional[timedelta] = None
+) -> bool:
+    """
+    Takes or renews the purge lease, returns whether `owner` holds it
+    """
+    _ensure_purge_state(database)
+    now = datetime.utcnow()
+    duration = timedelta(seconds=purge_interval() * 2) if duration is None else duration
+    result = database.execute(
+        update(PurgeState)
+        .where(PurgeState.id == PURGE_STATE_ID)
+        .where(
+            or_(
+                PurgeState.lease_owner == owner,
+                PurgeState.lease_owner.is_(None),
+                PurgeState.lease_expires_at < now,
+            )
+        )
+        .values(lease_owner=owner, lease_expires_at=now + duration),
+        execution_options={"synchronize_session": False},
+    )
+    database.commit()
+    return cast(CursorResult, result).rowcount == 1
+
+
+def purge_deleted_todos(
+    database: Session,
+    batch_size: Optional[int] = None,
+    retention: Optional[timedelta] = None,
+) -> int:
+    """
+    Hard deletes one batch of tombstones older than retention, returns number of purged todos
+    """
+    retention = purge_retention() if retention is None else retention
+    cutoff = datetime.utcnow() - retention
+    batch = (
+        select(Todos.id)
+        .where(Todos.deleted_at <= cutoff)
+        .limit(batch_size or purge_batch_size())
+    )
+    _ensure_purge_state(database)
+    purged = cast(
+        CursorResult,
+        database.execute(
+            delete(Todos).where(Todos.id.in_(batch)),
+            execution_options={"synchronize_session": False},
+        ),
+    ).rowcount
+    database.execute(
+        update(PurgeState)
+        .where(PurgeState.id == PURGE_STATE_ID)
+        .values(
+            purged_total=PurgeState.purged_total + purged,
+            last_purge_at=datetime.utcnow(),
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    database.commit()
+    return purged
+
+
+def purge_due(database: Session, retention: Optional[timedelta] = None) -> bool:
+    """
+    Whether there are tombstones older than retention
+    """
+    retention = purge_retention() if retention is None else retention
+    cutoff = datetime.utcnow() - retention
+    due = database.scalar(select(Todos.id).where(Todos.deleted_at <= cutoff).limit(1))
+    return due is not None
+
+
+def purge_lag(database: Session, retention: Optional[timedelta] = None) -> dict:
+    """
+    Tombstones waiting for the purge and how long the oldest of them is overdue
+    """
+    # pylint: disable=not-callable
+    retention = purge_retention() if retention is None else retention
+    cutoff = datetime.utcnow() - retention
+    tombstones = database.scalar(
+        select(func.count(Todos.id)).where(Todos.deleted_at.is_not(None))
+    )
+    pending, oldest = database.execute(
+        select(func.count(Todos.id), func.min(Todos.deleted_at)).where(
+            Todos.deleted_at <= cutoff
+        )
+    ).one()
+    state = database.get(PurgeState, PURGE_STATE_ID)
+    return {
+        "tombstones": tombstones,
+        "pending_purge": pending,
+        "purge_lag_seconds": (cutoff - oldest).total_seconds() if oldest else 0,
+        "purged_total": state.purged_total if state else 0,
+        "last_purge_at": state.last_purge_at if state else None,
+        "lease_owner": state.lease_owner if state else None,
+    }
+
+
+def database_is_idle() -> bool:
+    # No connection is checked out from the pool, so no request is using the database
+    checkedout = getattr(engine.pool, "checkedout", None)
+    return checkedout is None or checkedout() == 0
+
+
+@contextmanager
+def _no_busy_wait(database: Session):
+    """
+    On SQLite fails at once instead of waiting for the lock held by another worker
+    """
+    if engine.dialect.name != "sqlite":
+        yield
+        return
+    busy_timeout = database.execute(text("PRAGMA busy_timeout")).scalar()
+    database.execute(text("PRAGMA busy_timeout = 0"))
+    try:
+        yield
+    finally:
+        database.rollback()
+        database.execute(text(f"PRAGMA busy_timeout = {int(busy_timeout or 0)}"))
+
+
+def _purge_due() -> bool:
+    database = SessionLocal()
+    try:
+        return purge_due(database)
+    finally:
+        database.close()
+
+
+def _acquire_lease() -> bool:
+    database = SessionLocal()
+    try:
+        with _no_busy_wait(database):
+            return acquire_purge_lease(database, purge_lease_owner())
+    finally:
+        database.close()
+
+
+def _purge_batch() -> int:
+    database = SessionLocal()
+    try:
+        with _no_busy_wait(database):
+            return purge_deleted_todos(database)
+    finally:
+        database.close()
+
+
+async def purge_periodically():
+    while True:
+        await asyncio.sleep(purge_interval())
+        try:
+            # Lease is a write, so it is not taken while requests use the database or
+            # when there is nothing to purge
+            if not database_is_idle() or not await run_in_threadpool(_purge_due):
+                continue
+            if not await run_in_threadpool(_acquire_lease):
+                continue
+            while database_is_idle():
+                if await run_in_threadpool(_purge_batch) < purge_batch_size():
+                    break
+        except OperationalError as exc:
+            if "database is locked" not in str(exc):
+                logger.warning(f"Purging deleted todos failed: {exc}")
+        except Exception:  # pylint: disable=broad-exception-caught
+            # The task keeps running, it would not be restarted until the worker restarts
+            logger.exception("Purging deleted todos failed")
@@ -0,0 +1,98 @@
+"""
+Queries running on almost every request
+
+Statements are built once on import with `bindparam` placeholders instead of on every call,
+so SQLAlchemy finds their compiled form in the engine cache without rebuilding the statement
+and generating its cache key again. Only parameter values are passed on each call.
+`python -m benchmarks.repository_benchmark` compares it with the `Query` API.
+"""
+from datetime import datetime
+from typing import Optional, Sequence, cast
+from sqlalchemy import CursorResult, bindparam, select, update
+from sqlalchemy.orm import Session
+from todo_app.models import Todos, Users
+
+_user_todos = (
+    select(Todos)
+    .where(Todos.owner_id == bindparam("owner_id"))
+    .where(Todos.deleted_at.is_(None))
+)
+_user_todo = (
+    select(Todos)
+    .where(Todos.id == bindparam("todo_id"))
+    .where(Todos.owner_id == bindparam("owner_id"))
+    .where(Todos.deleted_at.is_(None))
+    .limit(1)
+)
+_all_todos = select(Todos).where(Todos.deleted_at.is_(None))
+_all_users = select(Users)
+_user_by_username = (
+    select(Users).where(Users.username == bindparam("username")).limit(1)
+)
+_user_by_id = select(Users).where(Users.id == bindparam("user_id")).limit(1)
+_soft_delete_todo = (
+    update(Todos)
+    .where(Todos.id == bindparam("todo_id"))
+    .where(Todos.deleted_at.is_(None))
+    .values(deleted_at=bindparam("now"))
+    .execution_options(synchronize_session=False)
+)
+# Column names could not be used as bindparam names in UPDATE
+_soft_delete_user_todo = _soft_delete_todo.where(
+    Todos.owner_id == bindparam("todo_owner_id")
+)
+_restore_todo = (
+    update(Todos)
+    .where(Todos.id == bindparam("todo_id"))
+    .where(Todos.deleted_at.is_not(None))
+    .values(deleted_at=None)
+    .execution_options(synchronize_session=False)
+)
+
+
+def get_user_todos(database: Session, owner_id: int) -> Sequence[Todos]:
+    return database.scalars(_user_todos, {"owner_id": owner_id}).all()
+
+
+def get_user_todo(database: Session, todo_id: int, owner_id: int) -> Optional[Todos]:
+    return database.scalars(
+        _user_todo, {"todo_id": todo_id, "owner_id": owner_id}
+    ).first()
+
+
+def get_all_todos(database: Session) -> Sequence[Todos]:
+    return database.scalars(_all_todos).all()
+
+
+def get_all_users(database: Session) -> Sequence[Users]:
+    return database.scalars(_all_users).all()
+
+
+def get_user_by_username(database: Session, username: str) -> Optional[Users]:
+    return database.scalars(_user_by_username, {"username": username}).first()
+
+
+def get_user_by_id(database: Session, user_id: int) -> Optional[Users]:
+    return database.scalars(_user_by_id, {"user_id": user_id}).first()
+
+
+def _execute_update(database: Session, statement, params: dict) -> int:
+    return cast(CursorResult, database.execute(statement, params)).rowcount
+
+
+def soft_delete_todo(database: Session, todo_id: int) -> int:
+    return _execute_update(
+        database, _soft_delete_todo, {"todo_id": todo_id, "now": datetime.utcnow()}
+    )
+
+
+def soft_delete_user_todo(database: Session, todo_id: int, owner_id: int) -> int:
+    return _execute_update(
+        database,
+        _soft_delete_user_todo,
+        {"todo_id": todo_id, "todo_owner_id": owner_id, "now": datetime.utcnow()},
+    )
+
+
+def restore_todo(database: Session, todo_id: int) -> int:
+    return _execute_update(database, _restore_todo, {"todo_id": todo_id})
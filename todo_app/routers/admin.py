@@ -1,12 +1,14 @@
 from typing import Annotated
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, Depends, status, Path
-from todo_app.models import Todos, Users
+from todo_app import repository
 from todo_app.database import get_db
+from todo_app.encoding import NegotiatedRoute
 from todo_app.exceptions import TODONotFoundException, AuthenticationFailed
+from todo_app.purge import purge_lag
 from todo_app.routers.auth import get_current_user
 
-router = APIRouter(prefix="/admin", tags=["admin"])
+router = APIRouter(prefix="/admin", tags=["admin"], route_class=NegotiatedRoute)
 
 DbDependency = Annotated[Session, Depends(get_db)]
 UserDependency = Annotated[dict, Depends(get_current_user)]
@@ -16,14 +18,14 @@ UserDependency = Annotated[dict, Depends(get_current_user)]
 async def read_all_todos(user: UserDependency, database: DbDependency):
     if user is None or user.get("user_role") != "admin":
         raise AuthenticationFailed
-    return database.query(Todos).all()
+    return repository.get_all_todos(database)
 
 
 @router.get("/user", status_code=status.HTTP_200_OK)
 async def read_all_users(user: UserDependency, database: DbDependency):
     if user is None or user.get("user_role") != "admin":
         raise AuthenticationFailed
-    return database.query(Users).all()
+    return repository.get_all_users(database)
 
 
 @router.delete("/todo/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -32,8 +34,25 @@ async def delete_todo(
 ):
     if user is None or user.get("user_role") != "admin":
         raise AuthenticationFailed
-    todo = database.query(Todos).filter(Todos.id == todo_id).first()
-    if not todo:
+    # Soft delete, the todo is hard deleted later by the purge task
+    if not repository.soft_delete_todo(database, todo_id):
         raise TODONotFoundException
-    database.delete(todo)
     database.commit()
+
+
+@router.put("/todo/{todo_id}/restore", status_code=status.HTTP_204_NO_CONTENT)
+async def restore_todo(
+    user: UserDependency, database: DbDependency, todo_id: int = Path(gt=0)
+):
+    if user is None or user.get("user_role") != "admin":
+        raise AuthenticationFailed
+    if not repository.restore_todo(database, todo_id):
+        raise TODONotFoundException
+    database.commit()
+
+
+@router.get("/purge", status_code=status.HTTP_200_OK)
+async def read_purge_stats(user: UserDependency, database: DbDependency):
+    if user is None or user.get("user_role") != "admin":
+        raise AuthenticationFailed
+    return purge_lag(database)
@@ -1,22 +1,18 @@
 import os
 from datetime import timedelta, datetime
+from functools import lru_cache
 from typing import Annotated
 from fastapi import APIRouter, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from pydantic import BaseModel
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
-from dotenv import load_dotenv
-from jose import jwt, JWTError
+from todo_app import repository
 from todo_app.models import Users
 from todo_app.database import get_db
 from todo_app.exceptions import AuthenticationFailed
 
-load_dotenv()
-
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 
@@ -37,9 +33,18 @@ class Token(BaseModel):
 DbDependency = Annotated[Session, Depends(get_db)]
 
 
+# passlib and jose are imported lazily, so they are not loaded on the application start
+# in every worker, but on the first request which needs them
+@lru_cache(maxsize=None)
+def get_bcrypt_context():
+    from passlib.context import CryptContext  # pylint: disable=import-outside-toplevel
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
 def authenticate_user(username: str, password: str, database):
-    user = database.query(Users).filter(Users.username == username).first()
-    if user and bcrypt_context.verify(password, user.hashed_password):
+    user = repository.get_user_by_username(database, username)
+    if user and get_bcrypt_context().verify(password, user.hashed_password):
         return user
     return False
 
@@ -47,6 +52,8 @@ def authenticate_user(username: str, password: str, database):
 def create_access_token(
     username: str, user_id: int, role: str, expires_delta: timedelta
 ):
+    from jose import jwt  # pylint: disable=import-outside-toplevel
+
     secret_key = os.environ["JWT_SECRET_KEY"]
     algorithm = os.environ["JWT_ALGORITHM"]
 
@@ -60,6 +67,8 @@ def create_access_token(
 
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
+    from jose import jwt, JWTError  # pylint: disable=import-outside-toplevel
+
     secret_key = os.environ["JWT_SECRET_KEY"]
     algorithm = os.environ["JWT_ALGORITHM"]
     try:
@@ -81,7 +90,7 @@ def create_user(database: DbDependency, create_user_request: CreateUserRequest):
         username=create_user_request.username,
         first_name=create_user_request.first_name,
         last_name=create_user_request.last_name,
-        hashed_password=bcrypt_context.hash(create_user_request.password),
+        hashed_password=get_bcrypt_context().hash(create_user_request.password),
         role=create_user_request.role,
         is_active=True,
     )
@@ -2,12 +2,14 @@ from typing import Annotated, Optional
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from fastapi import APIRouter, Depends, status, Path
+from todo_app import repository
 from todo_app.models import Todos
 from todo_app.database import get_db
+from todo_app.encoding import NegotiatedRoute
 from todo_app.exceptions import TODONotFoundException
 from todo_app.routers.auth import get_current_user
 
-router = APIRouter(prefix="/todo", tags=["todo"])
+router = APIRouter(prefix="/todo", tags=["todo"], route_class=NegotiatedRoute)
 
 DbDependency = Annotated[Session, Depends(get_db)]
 UserDependency = Annotated[dict, Depends(get_current_user)]
@@ -29,19 +31,14 @@ class TodoUpdate(BaseModel):
 
 @router.get("/", status_code=status.HTTP_200_OK)
 async def read_all(user: UserDependency, database: DbDependency):
-    return database.query(Todos).filter(Todos.owner_id == user.get("id")).all()
+    return repository.get_user_todos(database, user["id"])
 
 
 @router.get("/{todo_id}", status_code=status.HTTP_200_OK)
 async def get_todo_by_id(
     user: UserDependency, database: DbDependency, todo_id: int = Path(gt=0)
 ):
-    todo_element = (
-        database.query(Todos)
-        .filter(Todos.id == todo_id)
-        .filter(Todos.owner_id == user.get("id"))
-        .first()
-    )
+    todo_element = repository.get_user_todo(database, todo_id, user["id"])
     if todo_element is None:
         raise TODONotFoundException
     return todo_element
@@ -64,12 +61,7 @@ async def update_todo(
     todo_request: TodoUpdate,
     todo_id: int = Path(gt=0),
 ):
-    updatable_todo = (
-        database.query(Todos)
-        .filter(Todos.id == todo_id)
-        .filter(Todos.owner_id == user.get("id"))
-        .first()
-    )
+    updatable_todo = repository.get_user_todo(database, todo_id, user["id"])
     if not updatable_todo:
         raise TODONotFoundException
 
@@ -83,13 +75,7 @@ async def update_todo(
 async def delete_todo(
     user: UserDependency, database: DbDependency, todo_id: int = Path(gt=0)
 ):
-    deletable_todo = (
-        database.query(Todos)
-        .filter(Todos.id == todo_id)
-        .filter(Todos.owner_id == user.get("id"))
-        .first()
-    )
-    if not deletable_todo:
+    # Soft delete, the todo is hard deleted later by the purge task
+    if not repository.soft_delete_user_todo(database, todo_id, user["id"]):
         raise TODONotFoundException
-    database.delete(deletable_todo)
     database.commit()
@@ -1,15 +1,13 @@
 from typing import Annotated, Optional, Union
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from passlib.context import CryptContext
 from fastapi import APIRouter, Depends, status
-from todo_app.models import Todos, Users
+from todo_app import repository
 from todo_app.database import get_db
 from todo_app.exceptions import AuthenticationFailed, UserNotFoundException
-from todo_app.routers.auth import get_current_user
+from todo_app.routers.auth import get_bcrypt_context, get_current_user
 
 router = APIRouter(prefix="/user", tags=["user"])
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 DbDependency = Annotated[Session, Depends(get_db)]
 UserDependency = Annotated[dict, Depends(get_current_user)]
@@ -27,16 +25,14 @@ class UserUpdate(BaseModel):
 def verify_password(
     hashed_password: Union[str, bytes], password: Union[str, bytes]
 ) -> bool:
-    if bcrypt_context.verify(password, hashed_password):
+    if get_bcrypt_context().verify(password, hashed_password):
         return True
     return False
 
 
 @router.get("/", status_code=status.HTTP_200_OK)
 async def get_user(user: UserDependency, database: DbDependency):
-    user_info = (
-        database.query(Users).filter(Users.username == user.get("username")).first()
-    )
+    user_info = repository.get_user_by_username(database, user["username"])
     if not user_info:
         raise UserNotFoundException
     return user_info
@@ -46,7 +42,7 @@ async def get_user(user: UserDependency, database: DbDependency):
 async def update_user(
     user: UserDependency, database: DbDependency, user_request: UserUpdate
 ):
-    updatable_user = database.query(Users).filter(Todos.id == user.get("id")).first()
+    updatable_user = repository.get_user_by_id(database, user["id"])
     if not updatable_user:
         raise UserNotFoundException
     if not verify_password(
@@ -57,7 +53,11 @@ async def update_user(
     user_updates = user_request.model_dump(exclude_unset=True)
     if user_updates.get("new_password"):
         user_updates.update(
-            {"hashed_password": bcrypt_context.hash(user_updates.pop("new_password"))}
+            {
+                "hashed_password": get_bcrypt_context().hash(
+                    user_updates.pop("new_password")
+                )
+            }
         )
     updatable_user.update(**user_updates)
 
@@ -0,0 +1,116 @@
+import gzip
+import json
+
+import brotli  # type: ignore
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from todo_app.encoding import (
+    COMPRESSORS,
+    DECOMPRESSORS,
+    CompressionMiddleware,
+    negotiate_encoding,
+)
+from todo_app.exceptions import InvalidRequestBody
+
+LARGE_BODY = [{"id": i, "title": "todo title", "complete": False} for i in range(100)]
+
+encoded_app = FastAPI()
+encoded_app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+
+@encoded_app.get("/large")
+async def large():
+    return LARGE_BODY
+
+
+@encoded_app.get("/small")
+async def small():
+    return {"id": 1}
+
+
+@encoded_app.get("/stream")
+async def stream():
+    async def chunks():
+        for i in range(10):
+            yield f"chunk {i}\n".encode() * 100
+
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+@pytest.fixture
+def client():
+    client = TestClient(encoded_app)
+    yield client
+
+
+def decompress(encoding, body):
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    if encoding == "br":
+        return brotli.decompress(body)
+    return gzip.decompress(body)
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip, deflate, br, zstd") == "zstd"
+    assert negotiate_encoding("gzip, br;q=0.5") == "gzip"
+    assert negotiate_encoding("*") == "zstd"
+    assert negotiate_encoding("zstd;q=0, gzip") == "gzip"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("") is None
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_compressed_response(client, encoding):
+    # Raw body is read, because httpx does not decode zstd
+    with client.stream(
+        "GET", "/large", headers={"Accept-Encoding": encoding}
+    ) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(raw)
+    assert json.loads(decompress(encoding, raw)) == LARGE_BODY
+
+
+def test_streaming_response(client):
+    with client.stream(
+        "GET", "/stream", headers={"Accept-Encoding": "zstd"}
+    ) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "zstd"
+    assert "content-length" not in response.headers
+    expected = b"".join(f"chunk {i}\n".encode() * 100 for i in range(10))
+    assert decompress("zstd", raw) == expected
+
+
+def test_not_compressed_response(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"id": 1}
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == LARGE_BODY
+
+
+@pytest.mark.parametrize("encoding", ["zstd", "br", "gzip"])
+def test_decompress_limit(encoding):
+    compressor = COMPRESSORS[encoding]()
+    body = compressor.compress(b"0" * 10_000_000) + compressor.flush()
+    assert 1000 < len(DECOMPRESSORS[encoding](body, 1000)) < 300_000
+    assert DECOMPRESSORS[encoding](body, 10_000_000) == b"0" * 10_000_000
+
+
+@pytest.mark.parametrize("encoding", ["zstd", "br", "gzip"])
+def test_decompress_invalid(encoding):
+    compressor = COMPRESSORS[encoding]()
+    body = compressor.compress(b"{}") + compressor.flush()
+    # --- Negative, truncated stream and data after the end of it
+    for invalid in (body[:-2], body + body, body + b"junk"):
+        with pytest.raises((InvalidRequestBody, brotli.error)):
+            DECOMPRESSORS[encoding](invalid, 1000)
@@ -0,0 +1,84 @@
+import os
+
+import dotenv
+import pytest
+import uvicorn
+from fastapi.testclient import TestClient
+
+from todo_app import __main__ as main_module
+from todo_app import models
+from todo_app.__main__ import main
+from todo_app.main import app
+
+
+@pytest.fixture
+def create_schema_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(models, "create_schema", calls.append)
+    yield calls
+
+
+@pytest.fixture
+def uvicorn_run_kwargs(monkeypatch):
+    run_kwargs = {}
+    monkeypatch.setattr(
+        uvicorn, "run", lambda app, **kwargs: run_kwargs.update(app=app, **kwargs)
+    )
+    # serve sets DB_CREATE_ALL, monkeypatch restores it after the test
+    monkeypatch.setenv("DB_CREATE_ALL", "1")
+    for name in ("HOST", "PORT", "WEB_CONCURRENCY", "GRACEFUL_SHUTDOWN_TIMEOUT"):
+        monkeypatch.delenv(name, raising=False)
+    yield run_kwargs
+
+
+def test_serve_defaults(monkeypatch, create_schema_calls, uvicorn_run_kwargs):
+    monkeypatch.setattr("sys.argv", ["todo_app", "serve"])
+    main()
+    assert uvicorn_run_kwargs == {
+        "app": "todo_app.main:app",
+        "host": "127.0.0.1",
+        "port": 8000,
+        "workers": os.cpu_count() or 1,
+        "loop": "uvloop",
+        "http": "httptools",
+        "timeout_graceful_shutdown": 30,
+        "access_log": False,
+    }
+    assert len(create_schema_calls) == 1
+    assert os.environ["DB_CREATE_ALL"] == "0"
+
+
+def test_serve_environment(monkeypatch, create_schema_calls, uvicorn_run_kwargs):
+    monkeypatch.setenv("HOST", "0.0.0.0")
+    monkeypatch.setenv("PORT", "9000")
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    monkeypatch.setenv("GRACEFUL_SHUTDOWN_TIMEOUT", "5")
+    monkeypatch.setattr("sys.argv", ["todo_app", "serve", "--port", "9001"])
+    main()
+    assert uvicorn_run_kwargs["host"] == "0.0.0.0"
+    assert uvicorn_run_kwargs["port"] == 9001
+    assert uvicorn_run_kwargs["workers"] == 3
+    assert uvicorn_run_kwargs["timeout_graceful_shutdown"] == 5
+
+
+def test_serve_dotenv(tmp_path, monkeypatch, create_schema_calls, uvicorn_run_kwargs):
+    dotenv_path = tmp_path / ".env"
+    dotenv_path.write_text("PORT=9002\nWEB_CONCURRENCY=2\n")
+    # Variables loaded from .env are dropped with the copy after the test
+    monkeypatch.setattr(os, "environ", os.environ.copy())
+    monkeypatch.setattr(
+        main_module, "load_dotenv", lambda: dotenv.load_dotenv(dotenv_path)
+    )
+    monkeypatch.setattr("sys.argv", ["todo_app", "serve"])
+    main()
+    assert uvicorn_run_kwargs["port"] == 9002
+    assert uvicorn_run_kwargs["workers"] == 2
+
+
+@pytest.mark.parametrize("create_all, expected_calls", [("1", 1), ("0", 0)])
+def test_lifespan_create_all(
+    monkeypatch, create_schema_calls, create_all, expected_calls
+):
+    monkeypatch.setenv("DB_CREATE_ALL", create_all)
+    with TestClient(app):
+        assert len(create_schema_calls) == expected_calls
@@ -0,0 +1,59 @@
+from sqlalchemy import create_engine, inspect, text
+
+from todo_app import models
+from todo_app.models import create_schema
+
+OLD_TODOS_TABLE = (
+    "CREATE TABLE todos (id INTEGER NOT NULL, title VARCHAR NOT NULL, "
+    "description VARCHAR NOT NULL, priority INTEGER NOT NULL, "
+    "complete BOOLEAN, owner_id INTEGER, PRIMARY KEY (id))"
+)
+
+
+def test_create_schema_upgrades_existing_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'todos.db'}")
+    # Todos table as it was created before soft delete
+    with engine.begin() as connection:
+        connection.execute(text(OLD_TODOS_TABLE))
+    create_schema(engine)
+    # Running it again on up to date database does nothing
+    create_schema(engine)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("todos")}
+    indexes = {index["name"] for index in inspect(engine).get_indexes("todos")}
+    assert "deleted_at" in columns
+    assert "ix_todos_owner_id_live" in indexes
+    assert "purge_state" in inspect(engine).get_table_names()
+    engine.dispose()
+
+
+def test_create_schema_concurrent_upgrade(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'todos.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(OLD_TODOS_TABLE))
+
+    class RacingInspector:
+        """
+        Returns columns as they were before another worker added `deleted_at`
+        """
+
+        def __init__(self, bind):
+            self.inspector = inspect(bind)
+
+        def get_columns(self, table_name):
+            columns = self.inspector.get_columns(table_name)
+            monkeypatch.setattr(models, "inspect", inspect)
+            with engine.begin() as connection:
+                connection.execute(
+                    text("ALTER TABLE todos ADD COLUMN deleted_at DATETIME")
+                )
+            return columns
+
+    monkeypatch.setattr(models, "inspect", RacingInspector)
+    create_schema(engine)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("todos")}
+    indexes = {index["name"] for index in inspect(engine).get_indexes("todos")}
+    assert "deleted_at" in columns
+    assert "ix_todos_owner_id_live" in indexes
+    engine.dispose()
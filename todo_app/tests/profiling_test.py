@@ -0,0 +1,107 @@
+import json
+from datetime import timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from todo_app.database import Base
+from todo_app.database import get_db
+from todo_app import profiling
+from todo_app.profiling import (
+    install_profiler,
+    PROFILE_ID_HEADER,
+    PROFILE_SKIPPED_HEADER,
+)
+from todo_app.routers import admin
+from todo_app.routers.auth import create_access_token
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+Base.metadata.create_all(bind=engine)
+
+
+def mock_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+profiled_app = FastAPI()
+profiled_app.include_router(admin.router)
+profiled_app.dependency_overrides = {get_db: mock_get_db}
+install_profiler(profiled_app)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILING_DIR", str(tmp_path))
+    monkeypatch.setenv("PROFILING_MAX_FILES", "2")
+    client = TestClient(profiled_app)
+    yield client
+
+
+def token_for(role: str):
+    return create_access_token("profiler", 1, role, timedelta(minutes=5))
+
+
+def test_profile_admin_request(client, tmp_path):
+    response = client.get(
+        "/admin/todo",
+        headers={"Authorization": f"Bearer {token_for('admin')}", "X-Profile": "1"},
+    )
+    assert response.status_code == 200
+    profile_id = response.headers[PROFILE_ID_HEADER]
+    assert (tmp_path / f"{profile_id}.prof").exists()
+    info = json.loads((tmp_path / f"{profile_id}.json").read_text())
+    assert info["path"] == "/admin/todo"
+    assert info["status_code"] == 200
+    assert info["concurrent_requests"] == 0
+    assert any("FROM todos" in sql["statement"] for sql in info["sql"])
+
+
+def test_profile_skipped(client, tmp_path):
+    response = client.get(
+        "/admin/todo", headers={"Authorization": f"Bearer {token_for('admin')}"}
+    )
+    assert PROFILE_ID_HEADER not in response.headers
+    # --- Negative, not an admin
+    response = client.get(
+        "/admin/todo",
+        headers={"Authorization": f"Bearer {token_for('user')}", "X-Profile": "1"},
+    )
+    assert response.status_code == 401
+    assert PROFILE_ID_HEADER not in response.headers
+    assert PROFILE_SKIPPED_HEADER not in response.headers
+    # --- Negative, another request is being profiled
+    with profiling._profiling_lock:  # pylint: disable=protected-access
+        response = client.get(
+            "/admin/todo",
+            headers={"Authorization": f"Bearer {token_for('admin')}", "X-Profile": "1"},
+        )
+    assert response.status_code == 200
+    assert PROFILE_ID_HEADER not in response.headers
+    assert response.headers[PROFILE_SKIPPED_HEADER] == "busy"
+    assert not list(tmp_path.iterdir())
+
+
+def test_profiles_ring_buffer(client, tmp_path):
+    for _ in range(3):
+        client.get(
+            "/admin/user",
+            headers={"Authorization": f"Bearer {token_for('admin')}", "X-Profile": "1"},
+        )
+    assert len(list(tmp_path.glob("*.prof"))) == 2
+    assert len(list(tmp_path.glob("*.json"))) == 2
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from todo_app import purge
+from todo_app.models import Todos, create_schema
+
+
+@pytest.fixture
+def session_local(tmp_path, monkeypatch):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'todos.db'}", connect_args={"check_same_thread": False}
+    )
+    create_schema(engine)
+    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(purge, "engine", engine)
+    monkeypatch.setattr(purge, "SessionLocal", session_local)
+    yield session_local
+    engine.dispose()
+
+
+def add_deleted_todo(database):
+    database.add(
+        Todos(
+            title="todo",
+            description="todo",
+            priority=1,
+            owner_id=1,
+            deleted_at=datetime.utcnow() - timedelta(days=30),
+        )
+    )
+    database.commit()
+
+
+def test_purge_lease(session_local):
+    with session_local() as database:
+        assert purge.acquire_purge_lease(database, "worker-1")
+        # Renewing own lease
+        assert purge.acquire_purge_lease(database, "worker-1")
+        # --- Negative, lease is held by another worker
+        assert not purge.acquire_purge_lease(database, "worker-2")
+        # Expired lease is taken over
+        assert purge.acquire_purge_lease(database, "worker-1", timedelta(seconds=-1))
+        assert purge.acquire_purge_lease(database, "worker-2")
+        assert purge.purge_lag(database)["lease_owner"] == "worker-2"
+
+
+def test_purge_stats_in_database(session_local):
+    with session_local() as database:
+        add_deleted_todo(database)
+        add_deleted_todo(database)
+        assert purge.purge_deleted_todos(database, batch_size=1) == 1
+    # Stats are read by another session, as another worker would do
+    with session_local() as database:
+        stats = purge.purge_lag(database)
+        assert stats["purged_total"] == 1
+        assert stats["tombstones"] == 1
+        assert stats["pending_purge"] == 1
+        assert stats["last_purge_at"] is not None
+
+
+def test_purge_batch_does_not_wait_for_lock(session_local, tmp_path):
+    with session_local() as database:
+        add_deleted_todo(database)
+    other_worker = sqlite3.connect(tmp_path / "todos.db")
+    other_worker.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(OperationalError):
+            purge._acquire_lease()  # pylint: disable=protected-access
+        with pytest.raises(OperationalError):
+            purge._purge_batch()  # pylint: disable=protected-access
+    finally:
+        other_worker.rollback()
+        other_worker.close()
+    assert purge._purge_batch() == 1  # pylint: disable=protected-access
+    with session_local() as database:
+        # busy timeout of the pooled connection is restored
+        assert database.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def run_purge_periodically(monkeypatch, periods: int):
+    async def sleep(_):
+        nonlocal periods
+        periods -= 1
+        if periods < 0:
+            raise asyncio.CancelledError()
+
+    monkeypatch.setattr(purge.asyncio, "sleep", sleep)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(purge.purge_periodically())
+
+
+def test_purge_periodically(session_local, monkeypatch, caplog):
+    # Nothing to purge, lease is not taken
+    run_purge_periodically(monkeypatch, periods=1)
+    with session_local() as database:
+        assert purge.purge_lag(database)["lease_owner"] is None
+        add_deleted_todo(database)
+    # --- Negative, database is used by requests
+    with monkeypatch.context() as busy:
+        busy.setattr(purge, "database_is_idle", lambda: False)
+        run_purge_periodically(busy, periods=1)
+    with session_local() as database:
+        assert purge.purge_lag(database)["lease_owner"] is None
+    # --- Negative, unexpected error is logged and the task goes on
+    monkeypatch.setenv("PURGE_BATCH_SIZE", "many")
+    with caplog.at_level(logging.ERROR, logger=purge.__name__):
+        run_purge_periodically(monkeypatch, periods=2)
+    assert len(caplog.records) == 2
+    monkeypatch.setenv("PURGE_BATCH_SIZE", "100")
+    run_purge_periodically(monkeypatch, periods=1)
+    with session_local() as database:
+        assert purge.purge_lag(database)["tombstones"] == 0
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -7,6 +9,7 @@ from sqlalchemy.pool import StaticPool
 from todo_app.database import Base
 from todo_app.database import get_db
 from todo_app.main import app
+from todo_app.purge import purge_deleted_todos
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///"
 
@@ -127,6 +130,42 @@ def test_delete_todo(client, override_get_db, authenticate_user):
     assert response.status_code == 401
 
 
+def test_restore_todo(client, override_get_db, authenticate_user):
+    headers = {
+        "accept": "application/json",
+        "Authorization": f"Bearer {authenticate_user}",
+    }
+    assert client.get("/admin/todo", headers=headers).json() == []
+    response = client.put("/admin/todo/1/restore", headers=headers)
+    assert response.status_code == 204
+    assert len(client.get("/admin/todo", headers=headers).json()) == 1
+    # --- Negative, todo is not deleted
+    response = client.put("/admin/todo/1/restore", headers=headers)
+    assert response.status_code == 404
+
+
+def test_purge_deleted_todos(client, override_get_db, authenticate_user):
+    headers = {
+        "accept": "application/json",
+        "Authorization": f"Bearer {authenticate_user}",
+    }
+    client.delete("/admin/todo/1", headers=headers)
+    response = client.get("/admin/purge", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["tombstones"] == 1
+
+    with TestingSessionLocal() as db:
+        # Still in retention period
+        assert purge_deleted_todos(db) == 0
+        assert purge_deleted_todos(db, retention=timedelta(0)) == 1
+
+    response = client.get("/admin/purge", headers=headers)
+    assert response.json()["tombstones"] == 0
+    assert response.json()["purged_total"] == 1
+    response = client.put("/admin/todo/1/restore", headers=headers)
+    assert response.status_code == 404
+
+
 #
 #
 # def test_get_todo_by_id(client, override_get_db, authenticate_user):
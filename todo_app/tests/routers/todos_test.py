@@ -1,3 +1,7 @@
+import gzip
+import json
+
+import msgpack  # type: ignore
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -91,6 +95,7 @@ def test_read_all(client, override_get_db, authenticate_user):
         },
     )
     assert response.status_code == 200
+    assert "Accept" in response.headers["vary"]
     assert len(response.json()) == 1
     assert response.json() == [
         {
@@ -169,9 +174,103 @@ def test_delete_todo(client, override_get_db, authenticate_user):
         },
     )
     assert response.status_code == 204
+    response = client.get(
+        "/todo/1",
+        headers={
+            "accept": "application/json",
+            "Authorization": f"Bearer {authenticate_user}",
+        },
+    )
+    assert response.status_code == 404
     # --- Negative
     response = client.delete(
         "/todo/1",
         headers={"accept": "application/json", "Authorization": f"Bearer wrong token"},
     )
     assert response.status_code == 401
+
+
+def test_create_and_read_todos_msgpack(client, override_get_db, authenticate_user):
+    todo_data = {
+        "title": "msgpack",
+        "description": "string",
+        "priority": 3,
+        "complete": False,
+    }
+    response = client.post(
+        "/todo",
+        headers={
+            "Content-Type": "application/msgpack",
+            "Authorization": f"Bearer {authenticate_user}",
+        },
+        content=msgpack.packb(todo_data),
+    )
+    assert response.status_code == 201
+    response = client.get(
+        "/todo",
+        headers={
+            "accept": "application/msgpack",
+            "Authorization": f"Bearer {authenticate_user}",
+        },
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    assert "Accept" in response.headers["vary"]
+    assert msgpack.unpackb(response.content) == [{"id": 2, "owner_id": 1, **todo_data}]
+    # --- Negative
+    response = client.post(
+        "/todo",
+        headers={
+            "Content-Type": "application/msgpack",
+            "Authorization": f"Bearer {authenticate_user}",
+        },
+        content=b"\xc1",
+    )
+    assert response.status_code == 400
+
+
+def test_create_todo_gzip(client, override_get_db, authenticate_user, monkeypatch):
+    todo_data = {
+        "title": "gzip",
+        "description": "string",
+        "priority": 3,
+        "complete": False,
+    }
+    headers = {
+        "Content-Type": "application/json",
+        "Content-Encoding": "gzip",
+        "Authorization": f"Bearer {authenticate_user}",
+    }
+    response = client.post(
+        "/todo", headers=headers, content=gzip.compress(json.dumps(todo_data).encode())
+    )
+    assert response.status_code == 201
+    response = client.get(
+        "/todo/3",
+        headers={"Authorization": f"Bearer {authenticate_user}"},
+    )
+    assert response.json() == {"id": 3, "owner_id": 1, **todo_data}
+    # --- Negative, decompressed body is above the limit
+    monkeypatch.setenv("REQUEST_BODY_MAX_SIZE", "1000")
+    padded = json.dumps(todo_data).replace("{", "{" + " " * 1000, 1)
+    response = client.post(
+        "/todo", headers=headers, content=gzip.compress(padded.encode())
+    )
+    assert response.status_code == 413
+    # --- Negative, broken gzip stream
+    response = client.post("/todo", headers=headers, content=b"not gzip")
+    assert response.status_code == 400
+    # --- Negative, data after the first gzip member
+    response = client.post(
+        "/todo",
+        headers=headers,
+        content=gzip.compress(json.dumps(todo_data).encode()) + gzip.compress(b"x"),
+    )
+    assert response.status_code == 400
+    # --- Negative, unsupported encoding
+    response = client.post(
+        "/todo",
+        headers={**headers, "Content-Encoding": "deflate"},
+        content=json.dumps(todo_data).encode(),
+    )
+    assert response.status_code == 415
@@ -0,0 +1,104 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from todo_app.database import Base
+from todo_app.database import get_db
+from todo_app.main import app
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def client():
+    client = TestClient(app)
+    yield client
+
+
+@pytest.fixture
+def override_get_db(monkeypatch):
+    def mock_get_db():
+        try:
+            db = TestingSessionLocal()
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(app, "dependency_overrides", {get_db: mock_get_db})
+
+
+@pytest.fixture
+def authenticate_user(client, override_get_db):
+    token = client.post(
+        "/auth/token", data={"username": "string1", "password": "string"}
+    ).json()["access_token"]
+    yield token
+
+
+def test_create_user(client, override_get_db):
+    """
+    Creating temporary user and using created user in all tests
+    """
+    response = client.post(
+        "/auth",
+        json={
+            "email": "string1",
+            "username": "string1",
+            "first_name": "string",
+            "last_name": "string",
+            "password": "string",
+            "role": "string",
+        },
+    )
+    assert response.status_code == 201
+
+
+def test_get_user(client, override_get_db, authenticate_user):
+    response = client.get(
+        "/user",
+        headers={
+            "accept": "application/json",
+            "Authorization": f"Bearer {authenticate_user}",
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["username"] == "string1"
+    assert response.json()["first_name"] == "string"
+    # --- Negative
+    response = client.get(
+        "/user",
+        headers={"accept": "application/json", "Authorization": f"Bearer wrong token"},
+    )
+    assert response.status_code == 401
+
+
+def test_update_user(client, override_get_db, authenticate_user):
+    headers = {
+        "accept": "application/json",
+        "Authorization": f"Bearer {authenticate_user}",
+    }
+    response = client.put(
+        "/user/update",
+        json={"first_name": "updated_name", "password": "string"},
+        headers=headers,
+    )
+    assert response.status_code == 204
+    assert client.get("/user", headers=headers).json()["first_name"] == "updated_name"
+    # --- Negative
+    response = client.put(
+        "/user/update",
+        json={"first_name": "other_name", "password": "wrong password"},
+        headers=headers,
+    )
+    assert response.status_code == 401